@@ -8,12 +8,53 @@ After my first attempt, I realized I need to be more systematic.
 This version focuses on proper data cleaning and exploration.
 """
 
+import os
+
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless backend - we only ever save to PNG
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 
+# Optional: polars has a Rust-based Excel reader (calamine) that is way faster
+# than openpyxl on our multi-year logs. Fall back to pandas if it's not there.
+try:
+    import polars as pl
+    HAVE_POLARS = True
+except ImportError:
+    HAVE_POLARS = False
+
+# Optional: numba lets me write the rolling shutdown check as a single
+# compiled pass instead of materialising a whole rolling-mean column
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _rolling_below(values, window, threshold, out):
+        """
+        Running-sum rolling mean fused with a threshold test.
+
+        Adds the new sample and subtracts the one leaving the window, so
+        each element costs O(1) instead of O(window), and writes the bool
+        flag directly - no intermediate float array. Assumes the data has
+        already been cleaned (no NaNs poisoning the running sum).
+        """
+        s = 0.0
+        for i in range(values.shape[0]):
+            s += values[i]
+            if i >= window:
+                s -= values[i - window]
+            if i >= window - 1:
+                out[i] = (s / window) < threshold
+            else:
+                out[i] = False
+
 # Set up plotting style - I like this better than default
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -31,13 +72,50 @@ class CycloneAnalyzer:
         self.data_file = data_file
         self.df = None
         self.clean_df = None
+        # Lazy polars version of the clean frame - lets later steps
+        # (like the rolling shutdown detection) run fused + multi-threaded
+        self._lf = None
         
+    def _load_frame(self):
+        """
+        Load the raw Excel file as fast as possible.
+
+        Profiling showed pd.read_excel (openpyxl) dominates the whole run,
+        so I cache a .parquet sidecar next to the Excel file and use the
+        Rust-based calamine reader via polars when available.
+        """
+        # Check for a parquet cache that is newer than the Excel file
+        cache_file = os.path.splitext(self.data_file)[0] + '.parquet'
+        if os.path.exists(cache_file):
+            if os.path.getmtime(cache_file) >= os.path.getmtime(self.data_file):
+                print("  Using cached parquet file (much faster than Excel!)")
+                return pd.read_parquet(cache_file, engine='pyarrow')
+
+        if HAVE_POLARS:
+            try:
+                print("  Reading Excel with polars/calamine...")
+                df = pl.read_excel(self.data_file, engine='calamine').to_pandas()
+            except Exception as e:
+                print(f"  Polars reader failed ({e}), falling back to pandas")
+                df = pd.read_excel(self.data_file)
+        else:
+            # I learned from v1 that this works (just slowly)
+            df = pd.read_excel(self.data_file)
+
+        # Write the cache so next run skips Excel parsing entirely
+        try:
+            df.to_parquet(cache_file, engine='pyarrow')
+            print(f"  Cached data to {cache_file}")
+        except Exception as e:
+            print(f"  Couldn't write parquet cache: {e}")
+
+        return df
+
     def load_data(self):
         """Load and do basic validation of the data"""
         print("Loading data...")
-        
-        # I learned from v1 that this works
-        self.df = pd.read_excel(self.data_file)
+
+        self.df = self._load_frame()
         print(f"Loaded {len(self.df)} records")
         
         # Convert time column 
@@ -66,17 +144,24 @@ class CycloneAnalyzer:
         print("\nBasic statistics:")
         print(self.df.describe())
         
-        # Check for any obvious outliers or weird values
+        # Check for any obvious outliers or weird values.
+        # One agg call over all numeric columns instead of a Python loop
+        # with two separate reductions per column.
         print("\nLooking for unusual values:")
-        for col in self.df.columns:
-            if self.df[col].dtype in ['float64', 'int64']:
-                min_val = self.df[col].min()
-                max_val = self.df[col].max()
-                print(f"  {col}: min={min_val:.2f}, max={max_val:.2f}")
-                
-                # Flag potentially suspicious values
-                if min_val < -1000 or max_val > 2000:
-                    print(f"    ^ This seems unusual for {col}")
+        numeric = self.df.select_dtypes(include=np.number)
+        if numeric.empty:
+            # Before cleaning, the pandas Excel reader can leave every
+            # sensor column as object dtype (floats mixed with strings
+            # like "I/O Timeout") - nothing to summarise yet
+            print("  (no numeric columns yet - run clean_data first)")
+            return
+        stats_df = numeric.agg(['min', 'max'])
+        suspicious = (stats_df.loc['min'] < -1000) | (stats_df.loc['max'] > 2000)
+        for col in stats_df.columns:
+            print(f"  {col}: min={stats_df.at['min', col]:.2f}, "
+                  f"max={stats_df.at['max', col]:.2f}")
+            if suspicious[col]:
+                print(f"    ^ This seems unusual for {col}")
     
     def clean_data(self):
         """
@@ -86,45 +171,103 @@ class CycloneAnalyzer:
         UPDATE: Had to fix data type issues - the columns are stored as strings!
         """
         print("=== Data Cleaning ===")
-        
-        # Start with a copy
-        self.clean_df = self.df.copy()
-        
+
+        # If we've already cleaned this exact file, reuse the result -
+        # the load+clean pipeline is the slowest part of every run
+        cache_file = self._clean_cache_path()
+        if os.path.exists(cache_file):
+            if os.path.getmtime(cache_file) >= os.path.getmtime(self.data_file):
+                print("  Using cached clean dataset (skipping cleaning)")
+                self.clean_df = pd.read_parquet(cache_file, engine='pyarrow')
+                print(f"Clean dataset: {len(self.clean_df)} records")
+                return self.clean_df
+
         # First, I need to convert string columns to numeric
         # I discovered the sensor data is stored as strings, not numbers!
         print("Converting string columns to numeric...")
-        sensor_cols = ['Cyclone_Inlet_Gas_Temp', 'Cyclone_Material_Temp', 
+        sensor_cols = ['Cyclone_Inlet_Gas_Temp', 'Cyclone_Material_Temp',
                       'Cyclone_Outlet_Gas_draft', 'Cyclone_cone_draft',
                       'Cyclone_Gas_Outlet_Temp', 'Cyclone_Inlet_Draft']
-        
-        for col in sensor_cols:
-            # Convert to numeric, setting errors to NaN
-            self.clean_df[col] = pd.to_numeric(self.clean_df[col], errors='coerce')
-            print(f"  Converted {col} to numeric")
-        
+        temp_cols = [col for col in sensor_cols if 'Temp' in col]
+
+        if HAVE_POLARS:
+            # Polars fuses the cast + ffill + filter into one optimized,
+            # multi-threaded pass - much faster than step-by-step pandas
+            self._lf = (pl.from_pandas(self.df.reset_index())
+                        .lazy()
+                        .with_columns([pl.col(c).cast(pl.Float64, strict=False)
+                                       .forward_fill(limit=2)
+                                       for c in sensor_cols])
+                        .filter(pl.all_horizontal(pl.col(c) >= 0
+                                                  for c in temp_cols)))
+
+            # plain collect() - the win is the fused lazy plan; the
+            # streaming engine buys nothing at this data size and its
+            # keyword kept changing between polars versions
+            collected = self._lf.collect()
+            self.clean_df = collected.to_pandas().set_index('time')
+
+            return self._finalize_clean()
+
+        # Fallback: vectorised pandas version
+        # Start with a copy
+        self.clean_df = self.df.copy()
+
+        # Do the whole sensor block in one vectorised pass instead of
+        # column-by-column. My old loop filtered the frame once per temp
+        # column, which copied the entire DataFrame every time - ouch.
+        block = (self.clean_df[sensor_cols]
+                 .apply(pd.to_numeric, errors='coerce')
+                 .ffill(limit=2))  # forward fill small gaps only
+
         # Handle missing values (now properly as NaN)
-        print("Handling missing values...")
-        missing_counts = self.clean_df.isnull().sum()
         print("Missing values after conversion:")
+        missing_counts = block.isnull().sum()
         for col, missing in missing_counts.items():
             if missing > 0:
-                pct_missing = (missing / len(self.clean_df)) * 100
+                pct_missing = (missing / len(block)) * 100
                 print(f"  {col}: {missing} ({pct_missing:.1f}%)")
-        
-        # Forward fill small gaps only
-        for col in sensor_cols:
-            self.clean_df[col] = self.clean_df[col].ffill(limit=2)
-        
+
         # Remove obvious outliers (negative temperatures don't make sense)
-        temp_cols = [col for col in sensor_cols if 'Temp' in col]
-        for col in temp_cols:
-            before_count = len(self.clean_df)
-            # Remove negative temperatures - these are clearly errors
-            self.clean_df = self.clean_df[self.clean_df[col] >= 0]
-            after_count = len(self.clean_df)
-            if before_count != after_count:
-                print(f"  Removed {before_count - after_count} negative values from {col}")
-        
+        # One combined mask, one filter - no repeated frame copies.
+        # Per-column counts come from a single aggregate over the same
+        # comparison, not from diffing frame lengths in a loop.
+        # (>= 0 also drops rows still NaN after the limited ffill)
+        keep_mask = (block[temp_cols] >= 0).all(axis=1)
+        for col, count in (block[temp_cols] < 0).sum().items():
+            if count > 0:
+                print(f"  Removing {count} negative values from {col}")
+        removed = len(block) - int(keep_mask.sum())
+        if removed > 0:
+            print(f"  Removed {removed} rows with negative temperatures")
+
+        self.clean_df = (self.clean_df
+                         .assign(**{col: block[col] for col in sensor_cols})
+                         .loc[keep_mask])
+
+        return self._finalize_clean()
+
+    def _clean_cache_path(self):
+        """Where the cleaned-frame parquet cache lives"""
+        return os.path.splitext(self.data_file)[0] + '_clean.parquet'
+
+    def _finalize_clean(self):
+        """Shared final step for both cleaning paths"""
+        # Downcast the sensors to float32: the readings only have ~4
+        # significant digits, and half the byte width means half the
+        # memory traffic for every rolling / corr / plot step after this.
+        # (Temps and drafts are nowhere near float32 limits.)
+        sensor_cols = self.clean_df.select_dtypes(include=np.number).columns
+        self.clean_df[sensor_cols] = self.clean_df[sensor_cols].astype(np.float32)
+
+        # Cache the cleaned frame so the next run can skip straight here
+        try:
+            self.clean_df.to_parquet(self._clean_cache_path(),
+                                     engine='pyarrow', compression='zstd')
+            print(f"  Cached clean dataset to {self._clean_cache_path()}")
+        except Exception as e:
+            print(f"  Couldn't write clean-data cache: {e}")
+
         print(f"Clean dataset: {len(self.clean_df)} records")
         return self.clean_df
     
@@ -135,7 +278,9 @@ class CycloneAnalyzer:
         # Plot all sensors over time (sample period)
         sample_data = self.clean_df.iloc[:5000]  # First ~17 hours
         
-        fig, axes = plt.subplots(3, 2, figsize=(15, 12))
+        # constrained_layout replaces tight_layout/bbox_inches='tight',
+        # which re-rendered every figure twice just to measure the bbox
+        fig, axes = plt.subplots(3, 2, figsize=(15, 12), layout='constrained')
         fig.suptitle('Cyclone Sensor Data - Sample Period (First 17 hours)')
         
         axes = axes.flatten()
@@ -145,17 +290,22 @@ class CycloneAnalyzer:
             axes[i].tick_params(axis='x', rotation=45)
             axes[i].grid(True, alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig('sensor_overview.png', dpi=150, bbox_inches='tight')
+        plt.savefig('sensor_overview.png', dpi=100)
         print("Saved sensor_overview.png")
         
         # Correlation heatmap - always useful
-        plt.figure(figsize=(10, 8))
-        correlation_matrix = self.clean_df.corr()
+        # np.corrcoef does one BLAS matmul on the contiguous array; pandas
+        # .corr() walks the column pairs with per-pair NaN handling we
+        # don't need after cleaning
+        plt.figure(figsize=(10, 8), layout='constrained')
+        numeric = self.clean_df.select_dtypes(include=np.number)
+        arr = numeric.to_numpy(dtype=np.float64, copy=False)
+        correlation_matrix = pd.DataFrame(np.corrcoef(arr, rowvar=False),
+                                          index=numeric.columns,
+                                          columns=numeric.columns)
         sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0)
         plt.title('Sensor Correlation Matrix')
-        plt.tight_layout()
-        plt.savefig('correlation_heatmap.png', dpi=150, bbox_inches='tight')
+        plt.savefig('correlation_heatmap.png', dpi=100)
         print("Saved correlation_heatmap.png")
         
     def simple_shutdown_detection(self):
@@ -168,13 +318,34 @@ class CycloneAnalyzer:
         
         # I'll use inlet temperature as the main indicator
         temp_col = 'Cyclone_Inlet_Gas_Temp'
-        
-        # Calculate a rolling mean to smooth out noise
-        rolling_temp = self.clean_df[temp_col].rolling(window=12).mean()  # 1 hour average
-        
+
         # My hypothesis: below 300°C probably means shutdown
         shutdown_threshold = 300
-        potential_shutdowns = rolling_temp < shutdown_threshold
+
+        # Smooth with a rolling mean (window=12 -> 1 hour average) and flag
+        # low periods. The numba kernel does both in one O(1)-per-sample
+        # pass; otherwise fall back to polars (fused query) or pandas.
+        if HAVE_NUMBA:
+            values = self.clean_df[temp_col].to_numpy(dtype=np.float64)
+            flags = np.empty(len(values), dtype=np.bool_)
+            _rolling_below(values, 12, float(shutdown_threshold), flags)
+            potential_shutdowns = pd.Series(flags, index=self.clean_df.index)
+        elif self._lf is not None:
+            flags = (self._lf
+                     .select((pl.col(temp_col).rolling_mean(window_size=12)
+                              < shutdown_threshold).alias('shutdown'))
+                     .collect())
+            potential_shutdowns = pd.Series(flags['shutdown'].to_numpy(),
+                                            index=self.clean_df.index)
+        else:
+            rolling = self.clean_df[temp_col].rolling(window=12).mean()
+            potential_shutdowns = rolling < shutdown_threshold
+
+        # The smoothed temperature itself is only needed for the plot
+        # below, which shows the first 2000 samples - so only smooth
+        # those instead of materialising a float column over 3 years
+        head_temps = self.clean_df[temp_col].iloc[:2000]
+        rolling_head = head_temps.rolling(window=12).mean()
         
         # Count shutdown periods
         shutdown_count = potential_shutdowns.sum()
@@ -183,23 +354,22 @@ class CycloneAnalyzer:
         print(f"Potential shutdown periods: {shutdown_count} time points ({pct_shutdown:.1f}%)")
         
         # Plot this to see if it makes sense
-        plt.figure(figsize=(15, 6))
+        plt.figure(figsize=(15, 6), layout='constrained')
         plt.subplot(2, 1, 1)
-        plt.plot(self.clean_df.index[:2000], self.clean_df[temp_col][:2000], alpha=0.7, label='Raw Temperature')
-        plt.plot(self.clean_df.index[:2000], rolling_temp[:2000], label='1-hour Average', color='red')
+        plt.plot(head_temps.index, head_temps, alpha=0.7, label='Raw Temperature')
+        plt.plot(head_temps.index, rolling_head, label='1-hour Average', color='red')
         plt.axhline(y=shutdown_threshold, color='orange', linestyle='--', label=f'Shutdown Threshold ({shutdown_threshold}°C)')
         plt.legend()
         plt.title('Temperature Analysis for Shutdown Detection')
         plt.ylabel('Temperature (°C)')
         
         plt.subplot(2, 1, 2)
-        plt.plot(self.clean_df.index[:2000], potential_shutdowns[:2000], color='red', alpha=0.7)
+        plt.plot(head_temps.index, potential_shutdowns.iloc[:2000], color='red', alpha=0.7)
         plt.title('Detected Shutdown Periods')
         plt.ylabel('Shutdown (1=Yes, 0=No)')
         plt.xlabel('Time')
         
-        plt.tight_layout()
-        plt.savefig('shutdown_detection_simple.png', dpi=150, bbox_inches='tight')
+        plt.savefig('shutdown_detection_simple.png', dpi=100)
         print("Saved shutdown_detection_simple.png")
         
         return potential_shutdowns